@@ -1,51 +1,133 @@
-import os
-from typing import Any
-import firebase_admin
-from firebase_admin import credentials, firestore
+import sys
+import asyncio
+from typing import Any, Dict, List, Optional
+from google.cloud import firestore
+from google.cloud.firestore import AsyncClient, AsyncDocumentReference
+from google.oauth2 import service_account
 
 from logger import log, LogLevel
 from api.openai import SessionConfig
 
-from dotenv import load_dotenv
+FIRESTORE_CALLS_COLLECTION = 'calls'
+FIRESTORE_EVENTS_COLLECTION = 'events'  # Subcollection of each call document
+FIRESTORE_WARMUP_DOCUMENT = ('_warmup', '_')  # (collection, document) read once at startup
+FLUSH_DELAY_S = 0.05  # Debounce window for coalescing a call's events into one batch
+FLUSH_MAX_EVENTS = 500  # Flush early at Firestore's per-batch write limit
 
-load_dotenv(override=True)
+_firestore_client: Optional[AsyncClient] = None
 
-FIRESTORE_CALLS_COLLECTION = 'calls'
+def init(service_account_key_path: str):
+    '''
+    Creates the shared Firestore client from a service-account key file.
 
-firebase_service_account_key_path = os.getenv('FIREBASE_SERVICE_ACCOUNT_KEY_PATH')
-_firestore_client = None
+    Parameters
+    ----------
+    - `service_account_key_path` : `str`
+        Path to the service-account JSON key. The client is created for the
+        key's project. Exits the process if the client cannot be created;
+        later calls are no-ops.
+    '''
+    global _firestore_client
+    if _firestore_client is not None:
+        return
 
-if firebase_service_account_key_path:
     try:
-        if not firebase_admin._apps:
-            print(firebase_service_account_key_path)
-            cred = credentials.Certificate(firebase_service_account_key_path)
-            firebase_admin.initialize_app(cred)
-        _firestore_client = firestore.client()
+        # Only Firestore is used, so build its native asyncio client directly rather than through the Admin SDK
+        creds = service_account.Credentials.from_service_account_file(service_account_key_path)
+        _firestore_client = AsyncClient(project=creds.project_id, credentials=creds)
     except Exception as e:
         log(LogLevel.CRITICAL, f'Firestore client initialization failed: {e}')
-        exit(1)
-else:
-    log(LogLevel.CRITICAL, 'FIREBASE_SERVICE_ACCOUNT_KEY_PATH environment variable is not set.')
-    exit(1)
+        sys.exit(1)
+
+async def warm_up():
+    '''
+    Issues a throwaway read so the gRPC channel's TLS + HTTP/2 handshake
+    happens at startup instead of delaying the first call's writes. Call
+    documents and batched event writes share this client's channel.
+    '''
+    collection, document = FIRESTORE_WARMUP_DOCUMENT
+    try:
+        await _firestore_client.collection(collection).document(document).get()
+    except Exception as e:
+        log(LogLevel.WARNING, f'Firestore warm-up failed: {e}')
+
+_doc_refs: Dict[str, AsyncDocumentReference] = {}  # (k, v) = (Stream SID, call document)
+_pending_events: Dict[str, List[Dict[str, Any]]] = {}  # (k, v) = (Stream SID, events awaiting flush)
+_event_seqs: Dict[str, int] = {}  # (k, v) = (Stream SID, next event sequence number)
+_flush_tasks: Dict[str, asyncio.Task] = {}  # (k, v) = (Stream SID, debounced flush)
 
-def create_call_document(stream_sid: str, session_config: SessionConfig):
+def _get_doc_ref(stream_sid: str) -> AsyncDocumentReference:
+    doc_ref = _doc_refs.get(stream_sid)
+    if doc_ref is None:
+        doc_ref = _doc_refs[stream_sid] = _firestore_client.collection(FIRESTORE_CALLS_COLLECTION).document(stream_sid)
+    return doc_ref
+
+async def create_call_document(stream_sid: str, session_config: SessionConfig):
     call_document = {
         'stream_sid': stream_sid,
-        'session_config': session_config.model_dump(),
-        'events': [],
+        'session_config': session_config.to_document(),
         'created_at': firestore.SERVER_TIMESTAMP
     }
 
     try:
-        doc_ref = _firestore_client.collection(FIRESTORE_CALLS_COLLECTION).document(stream_sid)
-        doc_ref.set(call_document)
+        await _get_doc_ref(stream_sid).set(call_document)
     except Exception as e:
         log(LogLevel.WARNING, f'Failed to create call document: {e}')
 
-def add_event_to_call_document(stream_sid: str, event_data: Any):
+async def add_event_to_call_document(stream_sid: str, event_data: Dict[str, Any]):
+    '''
+    Queues an event for the call's `events` subcollection, coalescing writes per call.
+
+    Description
+    -----------
+    Events are buffered per `stream_sid` and committed in a single batched
+    write once `FLUSH_DELAY_S` has elapsed since the first buffered event,
+    or immediately once `FLUSH_MAX_EVENTS` are pending. Each event becomes
+    its own document carrying a `seq` field to order by when reading back.
+    Batches are committed with the native async client, so each call's
+    writes proceed independently without blocking the event loop.
+    '''
+    pending = _pending_events.setdefault(stream_sid, [])
+    pending.append(event_data)
+
+    if len(pending) >= FLUSH_MAX_EVENTS:
+        await flush_events(stream_sid)
+    elif stream_sid not in _flush_tasks:
+        _flush_tasks[stream_sid] = asyncio.create_task(_flush_after_delay(stream_sid))
+
+async def flush_events(stream_sid: str):
+    '''Writes all buffered events for `stream_sid` in a single batched commit.'''
+    pending = _pending_events.pop(stream_sid, None)
+    if not pending:
+        return
+
+    events_ref = _get_doc_ref(stream_sid).collection(FIRESTORE_EVENTS_COLLECTION)
+    seq = _event_seqs.get(stream_sid, 0)
+    _event_seqs[stream_sid] = seq + len(pending)
+
     try:
-        doc_ref = _firestore_client.collection(FIRESTORE_CALLS_COLLECTION).document(stream_sid)
-        doc_ref.update({'events': firestore.ArrayUnion([event_data])})
+        batch = _firestore_client.batch()
+        for event_data in pending:
+            batch.set(events_ref.document(), {**event_data, 'seq': seq})
+            seq += 1
+        await batch.commit()
     except Exception as e:
-        log(LogLevel.WARNING, f'Failed to add event to call document: {e}') 
\ No newline at end of file
+        log(LogLevel.WARNING, f'Failed to add events to call document: {e}')
+
+async def release(stream_sid: str):
+    '''
+    Flushes any buffered events for `stream_sid` and drops its cached
+    `DocumentReference`. Call once the call has ended.
+    '''
+    flush_task = _flush_tasks.pop(stream_sid, None)
+    if flush_task: flush_task.cancel()
+    await flush_events(stream_sid)
+    _doc_refs.pop(stream_sid, None)
+    _event_seqs.pop(stream_sid, None)
+
+async def _flush_after_delay(stream_sid: str):
+    try:
+        await asyncio.sleep(FLUSH_DELAY_S)
+    finally:
+        _flush_tasks.pop(stream_sid, None)
+    await flush_events(stream_sid)
@@ -1,5 +1,9 @@
+import sys
+import queue
+import atexit
 import pprint
 import datetime
+import threading
 from enum import Enum, auto
 
 
@@ -8,6 +12,7 @@ class LogLevel(Enum):
     CRITICAL = auto()
     WARNING = auto()
     INFO = auto()
+    DEBUG = auto()
 
 class TerminalColors:
     """A class to hold ANSI escape codes for terminal colors."""
@@ -19,6 +24,30 @@ class TerminalColors:
     BLUE = '\033[36m'
     ENDC = '\033[0m'  # Resets the color
 
+# Messages logged at a level less severe than this are discarded
+MIN_LEVEL = LogLevel.INFO
+
+_HEADERS = {
+    LogLevel.CRITICAL: f'{TerminalColors.RED}{LogLevel.CRITICAL.name}{TerminalColors.ENDC}: ',
+    LogLevel.WARNING: f'{TerminalColors.ORANGE}{LogLevel.WARNING.name}{TerminalColors.ENDC}: ',
+    LogLevel.INFO: f'{TerminalColors.BLUE}{LogLevel.INFO.name}{TerminalColors.ENDC}: ',
+    LogLevel.DEBUG: f'{TerminalColors.GREEN}{LogLevel.DEBUG.name}{TerminalColors.ENDC}: ',
+}
+
+# Messages are formatted and written by a background thread so callers on the
+# event loop never block on `pprint` or stdout. When the queue is full, new
+# messages are dropped rather than stalling the caller.
+_queue: queue.Queue = queue.Queue(maxsize=10000)
+
+def is_enabled(level: LogLevel) -> bool:
+    """
+    Returns whether messages at `level` are logged.
+
+    Args:
+        level (LogLevel): The log level to check.
+    """
+    return level.value <= MIN_LEVEL.value
+
 def log(level: LogLevel, message: str):
     """
     Logs a message with a specified level and color.
@@ -27,23 +56,44 @@ def log(level: LogLevel, message: str):
         level (LogLevel): The log level, must be a member of the LogLevel enum.
         message (any): The message to log. Can be a string, dict, list, etc.
     """
+    if isinstance(level, LogLevel) and level.value > MIN_LEVEL.value:
+        return
+    try:
+        _queue.put_nowait((level, message))
+    except queue.Full:
+        pass
+
+def _write(level: LogLevel, message: str):
     if not isinstance(level, LogLevel):
         # You could also raise a TypeError for stricter checking
-        print(f"{TerminalColors.ORANGE}[WARNING]{TerminalColors.ENDC} Invalid log level provided. Must be a LogLevel enum member.")
+        sys.stdout.write(f"{TerminalColors.ORANGE}[WARNING]{TerminalColors.ENDC} Invalid log level provided. Must be a LogLevel enum member.\n")
         return
 
-    if level == LogLevel.CRITICAL:
-        color = TerminalColors.RED
-    elif level == LogLevel.WARNING:
-        color = TerminalColors.ORANGE
+    # Format non-string messages using pprint for readability
+    if isinstance(message, str):
+        formatted_message = message
     else:
-        color = TerminalColors.BLUE
+        formatted_message = pprint.pformat(message, indent=2, width=120, compact=True)
+
+    sys.stdout.write(f"{_HEADERS[level]}{formatted_message:>10}\n")
+    sys.stdout.flush()
+
+def _run_writer():
+    while True:
+        item = _queue.get()
+        if item is None:  # Shutdown sentinel
+            return
+        try: _write(*item)
+        except Exception: pass
 
-    # Format the message using pprint for readability
-    formatted_message = pprint.pformat(message, indent=2)
+def _shutdown():
+    # Drain pending messages (e.g. a CRITICAL logged right before `exit(1)`)
+    _queue.put(None)
+    _writer.join(timeout=1.0)
 
-    header = f'{color}{level.name}{TerminalColors.ENDC}: '
-    print(f"{header}{formatted_message:>10}")
+_writer = threading.Thread(target=_run_writer, name='logger', daemon=True)
+_writer.start()
+atexit.register(_shutdown)
 
 if __name__ == "__main__":
-    log(LogLevel.INFO, "test")
\ No newline at end of file
+    log(LogLevel.INFO, "test")
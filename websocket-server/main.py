@@ -1,10 +1,12 @@
 # main.py
 import os
+import sys
 import asyncio
-import json
+import importlib.util
+import orjson
 from pathlib import Path
 from fastapi import FastAPI, WebSocket, HTTPException, WebSocketDisconnect
-from fastapi.responses import PlainTextResponse, JSONResponse
+from fastapi.responses import Response
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 from urllib.parse import urlparse
@@ -13,29 +15,52 @@ from starlette.websockets import WebSocketState
 
 from logger import log, LogLevel
 
+from api import firestore
 import sessions
 from sessions import WebSocketRole
 
 
+def _require_env(names: tuple[str, ...]) -> tuple[str, ...]:
+    '''Returns the values of the `names` environment variables, exiting on the first one missing.'''
+    values = []
+    for name in names:
+        value = os.getenv(name)
+        if not value:
+            log(LogLevel.CRITICAL, f'{name} environment variable is not set.')
+            sys.exit(1)
+        values.append(value)
+    return tuple(values)
+
+
 load_dotenv(override=True)
 
 PORT = int(os.getenv('PORT', '8081'))
 PUBLIC_URL = os.getenv('PUBLIC_URL', '')
-OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', '')
+OPENAI_API_KEY, FIREBASE_SERVICE_ACCOUNT_KEY_PATH = _require_env(('OPENAI_API_KEY', 'FIREBASE_SERVICE_ACCOUNT_KEY_PATH'))
 TWIML_FILE_PATH = Path(__file__).parent / 'twiml.xml'
+START_TIMEOUT_S = 10  # Seconds Twilio has to send its 'start' event
 
-if not OPENAI_API_KEY:
-    log(LogLevel.CRITICAL, 'OPENAI_API_KEY environment variable is not set.')
-    exit(1)
-if not os.getenv('FIREBASE_SERVICE_ACCOUNT_KEY_PATH'):
-    log(LogLevel.CRITICAL, 'FIREBASE_SERVICE_ACCOUNT_KEY_PATH for Firebase Admin SDK must be set.')
-    exit(1)
+firestore.init(FIREBASE_SERVICE_ACCOUNT_KEY_PATH)
 
 try:
-    with open(TWIML_FILE_PATH, 'r') as f: TWIML_TEMPLATE = f.read()
+    TWIML_TEMPLATE = TWIML_FILE_PATH.read_bytes()
 except FileNotFoundError:
     log(LogLevel.CRITICAL, f'TwiML file not found at {TWIML_FILE_PATH}')
-    exit(1)
+    sys.exit(1)
+
+# `PUBLIC_URL` and the template are fixed at startup, so render the TwiML once
+TWIML_RENDERED = b''
+if PUBLIC_URL:
+    # Convert HyperText Transfer Protocol Secure (https) to WebSocket Secure (wss)...
+    # ... or convert HyperText Transfer Protocol (http) to WebSocket (ws)
+    ws_parsed_url = urlparse(PUBLIC_URL)
+    scheme = 'wss' if ws_parsed_url.scheme == 'https' else 'ws'
+    WS_FULL_URL = f"{scheme}://{ws_parsed_url.netloc}{ws_parsed_url.path.rstrip('/')}/call"
+
+    # Inject new URL into Twilio Markup Language (TwiML)
+    TWIML_RENDERED = TWIML_TEMPLATE.replace(b'{{WS_URL}}', WS_FULL_URL.encode())
+
+PUBLIC_URL_BODY = orjson.dumps({'publicUrl': PUBLIC_URL})
 
 app = FastAPI()
 app.add_middleware(
@@ -43,8 +68,13 @@ app.add_middleware(
     allow_origins=['*'], allow_credentials=True, allow_methods=['*'], allow_headers=['*'],
 )
 
+@app.on_event('startup')
+async def warm_up_firestore():
+    # Not awaited so startup is not held up by the handshake
+    app.state.firestore_warm_up = asyncio.create_task(firestore.warm_up())
+
 @app.get('/public-url')
-async def get_public_url_endpoint(): return JSONResponse({'publicUrl': PUBLIC_URL})
+async def get_public_url_endpoint(): return Response(PUBLIC_URL_BODY, media_type='application/json')
 
 @app.post('/twiml')
 @app.get('/twiml')
@@ -52,91 +82,96 @@ async def get_twiml_endpoint():
     # Assert requirements
     if not PUBLIC_URL: raise HTTPException(status_code=500, detail='PUBLIC_URL is not configured.')
     if not TWIML_TEMPLATE: raise HTTPException(status_code=500, detail='TwiML template not loaded.')
-    
-    # Convert HyperText Transfer Protocol Secure (https) to WebSocket Secure (wss)...
-    # ... or convert HyperText Transfer Protocol (http) to WebSocket (ws)
-    ws_parsed_url = urlparse(PUBLIC_URL)
-    scheme = 'wss' if ws_parsed_url.scheme == 'https' else 'ws'
-    ws_full_url = f'{scheme}://{ws_parsed_url.netloc}{ws_parsed_url.path.rstrip('/')}/call'
-
-    # Inject new URL into Twilio Markup Language (TwiML)
-    twiml_content = TWIML_TEMPLATE.replace('{{WS_URL}}', ws_full_url)
 
-    return PlainTextResponse(twiml_content, media_type='application/xml')
+    return Response(TWIML_RENDERED, media_type='application/xml')
 
 @app.get('/tools')
 async def get_tools_endpoint():
     pass
 
 
+async def _receive_frame(ws: WebSocket) -> bytes | str:
+    '''
+    Returns the raw payload of the next frame, whether sent as text or binary.
+
+    Unlike `receive_text`/`receive_bytes`, this does not assume a frame type,
+    so binary frames reach `orjson.loads` as `bytes` without a UTF-8 decode.
+    '''
+    message = await ws.receive()
+    if message['type'] == 'websocket.disconnect':
+        raise WebSocketDisconnect(message.get('code', 1000), message.get('reason'))
+    frame = message.get('bytes')
+    return frame if frame is not None else message['text']
+
+async def _handle_media(session: sessions.Session, payload: dict):
+    media_payload = payload.get('media', {}).get('payload')
+
+    if session.ws_model and media_payload:
+        await session.send_input_audio(media_payload)
+
+async def _handle_stop(session: sessions.Session, payload: dict):
+    await sessions.remove(session.stream_sid, reason='Twilio call ended.')
+
+# Handlers for Twilio events once the call has started, keyed by event name
+_HANDLERS = {
+    'media': _handle_media,
+    'stop': _handle_stop,
+}
+
 @app.websocket('/call')
 async def websocket_call_endpoint(ws: WebSocket):
-    print('calls')
     # Perform WebSocket 'handshake'
     await ws.accept()
 
-    session = None
-
-    # Inspect the first `N` messages from Twilio
-    N = 10
-    for i in range(N):  
-        msg = await asyncio.wait_for(ws.receive_text(), timeout=10)
-        payload = json.loads(msg)  # { 'event': 'connected' | 'start' | 'media', ... }
-        log(LogLevel.INFO, payload)
-        match payload.get('event'):
-            case 'connected':  # Initial Twilio message
-                '''
-                # {'event': 'connected', 'protocol': 'Call', 'version': '1.0.0'}
-                '''
-                pass
-            case 'start':  # Ready to connect to AI assistant
-                '''
-                { 'event': 'start',
-                  'sequenceNumber': '1',
-                  'start': { 'accountSid': 'xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx',
-
-                             'callSid': 'xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx',
-                             'customParameters': {},
-                             'mediaFormat': { 'channels': 1,
-                                              'encoding': 'audio/x-mulaw',
-                                              'sampleRate': 8000},
-                             'streamSid': 'xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx',
-                             'tracks': ['inbound']},
-                  'streamSid': 'xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx'}
-                '''
-                start_payload = payload.get('start', {})
-                stream_sid = start_payload.get('streamSid')
-                
-                session = await sessions.get(stream_sid)
-
-                if not session:
-                    session = await sessions.create(stream_sid, OPENAI_API_KEY)
-
-                if session:
-                    await session.set_websocket(sessions.WebSocketRole.TWILIO, ws)
-                    break
-    
+    session = None  # Set once Twilio sends 'start'
+
     try:
+        # Twilio must send 'start' within `START_TIMEOUT_S`
+        async with asyncio.timeout(START_TIMEOUT_S):
+            while not session:
+                msg = await _receive_frame(ws)
+                payload = orjson.loads(msg)  # { 'event': 'connected' | 'start' | 'media' | 'stop', ... }
+                log(LogLevel.INFO, payload)
+
+                match payload.get('event'):
+                    case 'connected':  # Initial Twilio message
+                        '''
+                        # {'event': 'connected', 'protocol': 'Call', 'version': '1.0.0'}
+                        '''
+                        pass
+                    case 'start':  # Ready to connect to AI assistant
+                        '''
+                        { 'event': 'start',
+                          'sequenceNumber': '1',
+                          'start': { 'accountSid': 'xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx',
+
+                                     'callSid': 'xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx',
+                                     'customParameters': {},
+                                     'mediaFormat': { 'channels': 1,
+                                                      'encoding': 'audio/x-mulaw',
+                                                      'sampleRate': 8000},
+                                     'streamSid': 'xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx',
+                                     'tracks': ['inbound']},
+                          'streamSid': 'xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx'}
+                        '''
+                        start_payload = payload.get('start', {})
+                        stream_sid = start_payload.get('streamSid')
+
+                        session = sessions.create(stream_sid, OPENAI_API_KEY)  # Reuses an existing session
+
+                        await session.set_websocket(WebSocketRole.TWILIO, ws)
+
         while True:
-            msg = await ws.receive_text()
-            payload = json.loads(msg)
-            # log(LogLevel.INFO, payload)
-            
-            match payload.get('event'):
-                case 'media':
-                    media_payload = payload.get('media', {}).get('payload')
-
-                    if session.ws_model and media_payload:
-                        await session.send_to_websocket(WebSocketRole.MODEL, {
-                            "type": "input_audio_buffer.append",
-                            "audio": media_payload,
-                        })
-                case 'stop':
-                    await sessions.remove(session.stream_sid, reason='Twilio call ended.')
+            msg = await _receive_frame(ws)
+            payload = orjson.loads(msg)
+
+            handler = _HANDLERS.get(payload.get('event'))
+            if handler: await handler(session, payload)
     except WebSocketDisconnect:
-        await sessions.remove(session.stream_sid, 'Twilio WebSocket disconnected.')
+        if session: await sessions.remove(session.stream_sid, 'Twilio WebSocket disconnected.')
     except Exception as e:
-        await sessions.remove(session.stream_sid, f'Error: {e}')
+        if session: await sessions.remove(session.stream_sid, f'Error: {e}')
+        elif isinstance(e, TimeoutError): log(LogLevel.WARNING, f"Twilio did not send 'start' within {START_TIMEOUT_S}s.")
         if ws.client_state != WebSocketState.DISCONNECTED:
             try: await ws.close(code=1011)
             except Exception: pass
@@ -167,5 +202,7 @@ async def websocket_logs_endpoint(ws: WebSocket):
 if __name__ == '__main__':
     print(f'Starting Server on http://localhost:{PORT}')
     if not Path(TWIML_FILE_PATH).exists(): print(f"Warning: TwiML file '{TWIML_FILE_PATH}' not found.")
-    if not os.getenv('FIREBASE_SERVICE_ACCOUNT_KEY_PATH'): print('Warning: Firebase credentials not set.')
-    uvicorn.run('main:app', host='0.0.0.0', port=PORT, reload=True)
\ No newline at end of file
+    # uvloop (libuv event loop) and httptools (C HTTP parser) cut per-message overhead.
+    # uvloop is not available on Windows, so fall back to uvicorn's default loop there.
+    loop = 'uvloop' if importlib.util.find_spec('uvloop') else 'auto'
+    uvicorn.run('main:app', host='0.0.0.0', port=PORT, loop=loop, http='httptools', ws='websockets', reload=False)
@@ -1,9 +1,12 @@
-import json
+import re
+import ssl
+import time
 import datetime
 from enum import Enum
 from typing import Optional, Dict, Any
 
 import asyncio
+import orjson
 import websockets
 from fastapi import WebSocket
 from websockets import exceptions as ws_exceptions
@@ -11,9 +14,32 @@ from websockets import exceptions as ws_exceptions
 from api import openai
 from api import firestore
 
-from logger import log, LogLevel
+from logger import log, is_enabled, LogLevel
 
 
+# Hoisted so per-event timestamps skip the module attribute lookups
+_UTC = datetime.timezone.utc
+_now = datetime.datetime.now
+
+FIRESTORE_QUEUE_SIZE = 256  # Events buffered per session before the oldest are dropped
+TWILIO_QUEUE_SIZE = 64  # Outbound Twilio messages buffered per session
+TWILIO_STALL_S = 0.5  # A Twilio send in flight this long counts as stalled; only then is queued audio dropped
+TWILIO_DROP_LOG_INTERVAL_S = 5.0  # Minimum gap between warnings summarizing dropped Twilio frames
+
+# Matches an audio delta whose `type` leads the object, capturing its base64 `delta`.
+# Escaped strings fail to match and fall back to the full header decode.
+_AUDIO_DELTA_RE = re.compile(rb'\{\s*"type"\s*:\s*"response\.audio\.delta".*?"delta"\s*:\s*"([^"\\]*)"', re.DOTALL)
+
+# Built once and shared by every model connection so each connect skips loading the CA bundle
+_SSL_CONTEXT = ssl.create_default_context()
+_SSL_CONTEXT.set_alpn_protocols(['http/1.1'])
+
+
+async def _safe_close(ws, reason: str):
+    '''Closes `ws` normally (1000), ignoring any error since the peer may already be gone.'''
+    try: await ws.close(code=1000, reason=reason)
+    except Exception: pass
+
 
 class WebSocketRole(Enum):
     '''Possible session WebSockets.'''
@@ -24,20 +50,45 @@ class WebSocketRole(Enum):
 
 class Session:
     def __init__(self, stream_sid: str, ai_api_key: str, config: Optional[openai.SessionConfig] = None):
-        # WebSockets
-        self.ws_twilio: Optional[WebSocket] = None
-        self.ws_frontend: Optional[WebSocket] = None
-        self.ws_model: Optional[WebSocket] = None
-        
+        # WebSockets, keyed by role
+        self._ws: Dict[WebSocketRole, Optional[WebSocket]] = {role: None for role in WebSocketRole}
+
         # Session Configuration
         self.config: openai.SessionConfig = config if config else openai.SessionConfig()  # Consider pulling from Google Firestore
 
         # Metadata
         self.stream_sid: str = stream_sid
         self.ai_api_key: str = ai_api_key
-        self.start_time: datetime.datetime = datetime.datetime.now(datetime.timezone.utc)
+        self.start_time: datetime.datetime = _now(_UTC)
         self.is_model_connected: bool = False
         self._model_listener: Optional[asyncio.Task] = None
+        self._connect_lock: asyncio.Lock = asyncio.Lock()
+        self._firestore_queue: asyncio.Queue = asyncio.Queue(maxsize=FIRESTORE_QUEUE_SIZE)
+        self._firestore_writer: Optional[asyncio.Task] = None
+        self._twilio_queue: asyncio.Queue = asyncio.Queue(maxsize=TWILIO_QUEUE_SIZE)
+        self._twilio_sender: Optional[asyncio.Task] = None
+        self._twilio_send_started: Optional[float] = None  # `time.monotonic()` when the in-flight send began
+        self._twilio_dropped: int = 0  # Frames dropped since the last drop warning
+        self._twilio_drop_logged_at: float = float('-inf')
+        self._audio_msg: Dict[str, Any] = {'type': 'input_audio_buffer.append', 'audio': None}
+
+    @property
+    def ws_twilio(self) -> Optional[WebSocket]: return self._ws[WebSocketRole.TWILIO]
+
+    @ws_twilio.setter
+    def ws_twilio(self, ws: Optional[WebSocket]): self._ws[WebSocketRole.TWILIO] = ws
+
+    @property
+    def ws_frontend(self) -> Optional[WebSocket]: return self._ws[WebSocketRole.FRONTEND]
+
+    @ws_frontend.setter
+    def ws_frontend(self, ws: Optional[WebSocket]): self._ws[WebSocketRole.FRONTEND] = ws
+
+    @property
+    def ws_model(self) -> Optional[WebSocket]: return self._ws[WebSocketRole.MODEL]
+
+    @ws_model.setter
+    def ws_model(self, ws: Optional[WebSocket]): self._ws[WebSocketRole.MODEL] = ws
 
     async def set_websocket(self, role: WebSocketRole, ws: WebSocket):
         '''
@@ -58,25 +109,19 @@ class Session:
         has an active connection, this function will attempt to gracefully close
         the existing `WebSocket` before assigning the new one. If closing the old
         `WebSocket` fails, the error is silently ignored, and the new `WebSocket`
-        is assigned regardless.
+        is assigned regardless. Setting the TWILIO `WebSocket` also starts
+        connecting to the model and the task that drains the Twilio send queue.
         '''
-        match role:
-            case WebSocketRole.TWILIO:
-                if self.ws_twilio and self.ws_twilio != ws:
-                    try: await self.ws_twilio.close(code=1000)
-                    except Exception: pass
-                self.ws_twilio = ws
-                asyncio.create_task(self.connect_model())
-            case WebSocketRole.FRONTEND:
-                if self.ws_frontend and self.ws_frontend != ws:
-                    self.ws_frontend = ws
-                    try: await self.ws_frontend.close(code=1000)
-                    except Exception: pass
-            case WebSocketRole.MODEL:
-                if self.ws_model and self.ws_model != ws:
-                    self.ws_model = ws
-                    try: await self.ws_model.close(code=1000)
-                    except Exception: pass
+        old_ws = self._ws[role]
+        if old_ws and old_ws != ws:
+            try: await old_ws.close(code=1000)
+            except Exception: pass
+        self._ws[role] = ws
+
+        if role is WebSocketRole.TWILIO:
+            if not self._twilio_sender:
+                self._twilio_sender = asyncio.create_task(self._run_twilio_sender())
+            asyncio.create_task(self.connect_model())
 
     async def remove_websocket(self, role: WebSocketRole):
         '''
@@ -96,22 +141,11 @@ class Session:
         are silently ignored. After attempting to close, the `WebSocket`
         reference for that role is set to `None`.
         '''
-        match role:
-            case WebSocketRole.TWILIO:
-                if self.ws_twilio:
-                    try: await self.ws_twilio.close(code=1000)
-                    except Exception: pass
-                self.ws_twilio = None
-            case WebSocketRole.FRONTEND:
-                if self.ws_frontend:
-                    try: await self.ws_frontend.close(code=1000)
-                    except Exception: pass
-                self.ws_frontend = None
-            case WebSocketRole.MODEL:
-                if self.ws_model:
-                    try: await self.ws_model.close(code=1000)
-                    except Exception: pass
-                self.ws_model = None
+        ws = self._ws[role]
+        if ws:
+            try: await ws.close(code=1000)
+            except Exception: pass
+        self._ws[role] = None
 
     async def send_to_websocket(self, role: WebSocketRole, data: Any):
         '''
@@ -123,189 +157,401 @@ class Session:
             An enumeration indicating the type of service to which the data
             should be sent (e.g., TWILIO, FRONTEND, MODEL).
         - `data` : `Any`
-            The data to be sent over the `WebSocket`. For TWILIO and FRONTEND,
-            it's expected to be sent as JSON. For MODEL, it's converted to a
-            JSON string.
+            The data to be sent over the `WebSocket`, serialized to JSON with
+            `orjson`.
 
         Description
         -----------
         This function attempts to send the provided data to the `WebSocket`
         associated with the given role.
-        For TWILIO and FRONTEND roles, it uses `send_json`.
-        For the MODEL role, it converts the data to a JSON string and uses `send`.
-        It includes error handling for `ConnectionClosed` exceptions specifically
-        for the MODEL `WebSocket`, updating `is_model_connected` status, and
-        logs warnings for other exceptions during sending. Any exceptions for
-        TWILIO and FRONTEND roles are silently ignored.
+        For TWILIO and FRONTEND roles, it hands the JSON text to
+        `send_raw_text` rather than using `send_json` (stdlib `json`).
+        For the MODEL role, it serializes the data with `orjson` and hands the
+        bytes to `send_model_raw`, which handles `ConnectionClosed` by updating
+        `is_model_connected` and logs warnings for other exceptions. Any
+        exceptions for TWILIO and FRONTEND roles are silently ignored.
+        '''
+        if role is WebSocketRole.MODEL:
+            await self.send_model_raw(orjson.dumps(data))
+            return
+
+        try: frame = orjson.dumps(data).decode()
+        except Exception: return
+        await self.send_raw_text(role, frame)
+
+    async def send_model_raw(self, frame: bytes):
+        '''
+        Asynchronously sends an already-serialized JSON event to the model.
+
+        Parameters
+        ----------
+        - `frame` : `bytes`
+            The UTF-8 encoded JSON event.
+
+        Description
+        -----------
+        The bytes are sent as a text frame without being decoded first. A
+        `ConnectionClosed` exception updates `is_model_connected`; other
+        exceptions are logged as warnings.
+        '''
+        if self.ws_model and self.is_model_connected:
+            try:
+                await self.ws_model.send(frame, text=True)
+            except ws_exceptions.ConnectionClosed as e:
+                log(LogLevel.WARNING, f'LLM connection closed while sending {e}')
+                self.is_model_connected = False
+            except Exception as e:
+                log(LogLevel.WARNING, f'Error sending to LLM {e}')
+
+    async def send_raw_text(self, role: WebSocketRole, *frames: str):
+        '''
+        Asynchronously sends already-serialized text frames to a `WebSocket`.
+
+        Parameters
+        ----------
+        - `role` : `WebSocketRole`
+            The TWILIO or FRONTEND role to send to. Use `send_model_raw` for
+            MODEL.
+        - `*frames` : `str`
+            The serialized JSON messages, sent in order as separate frames.
+
+        Description
+        -----------
+        Skips the `dict` construction and JSON encoding of `send_to_websocket`
+        for frames built ahead of time, and writes several frames back to back
+        in a single call (e.g. a media message and its mark). Any exceptions
+        are silently ignored and stop the remaining frames from being sent.
+
+        TWILIO frames are queued rather than sent, so a slow Twilio socket
+        never stalls the model listener; the session's sender task writes
+        them in order. When the queue is full, this waits for the sender to
+        free a slot, since a model burst can outpace a healthy socket. Only
+        once a send has been in flight for `TWILIO_STALL_S` are the oldest
+        queued frames dropped, since stale audio is worse than a gap.
+        '''
+        if role is WebSocketRole.MODEL:
+            return
+        if role is WebSocketRole.TWILIO:
+            await self._queue_twilio_frames(frames)
+            return
+        ws = self._ws[role]
+        if ws:
+            try:
+                for frame in frames: await ws.send_text(frame)
+            except Exception: pass
+
+    async def send_input_audio(self, audio: str):
+        '''
+        Asynchronously forwards a base64 audio chunk to the model.
+
+        Description
+        -----------
+        Reuses the session's preallocated `input_audio_buffer.append` event,
+        swapping in `audio` and serializing it straight to bytes, instead of
+        building a new event `dict` for every media frame.
         '''
-        match role:
-            case WebSocketRole.TWILIO:
-                if self.ws_twilio:
-                    try: await self.ws_twilio.send_json(data)
-                    except Exception: pass
-            case WebSocketRole.FRONTEND:
-                if self.ws_frontend:
-                    try: await self.ws_frontend.send_json(data)
-                    except Exception: pass
-            case WebSocketRole.MODEL:
-                if self.ws_model and self.is_model_connected:
-                    msg = ''
-                    try:
-                        msg = json.dumps(data)
-                        await self.ws_model.send(msg)
-                    except ws_exceptions.ConnectionClosed as e:
-                        log(LogLevel.WARNING, f'LLM connection closed while sending {e}')
-                        self.is_model_connected = False
-                    except Exception as e:
-                        log(LogLevel.WARNING, f'Error sending to LLM {e}')
+        self._audio_msg['audio'] = audio
+        await self.send_model_raw(orjson.dumps(self._audio_msg))
 
     async def connect_model(self):
-        firestore.create_call_document(self.stream_sid, self.config)
+        await firestore.create_call_document(self.stream_sid, self.config)
+        if not self._firestore_writer:
+            self._firestore_writer = asyncio.create_task(self._run_firestore_writer())
+
+    def queue_firestore_event(self, raw_event: bytes, timestamp: datetime.datetime):
+        '''
+        Queues an event to be stored in the call's Firestore document.
+
+        Parameters
+        ----------
+        - `raw_event` : `bytes`
+            The event as received, still JSON-encoded.
+        - `timestamp` : `datetime.datetime`
+            When the event was received, stored as its `timestamp` field.
+
+        Description
+        -----------
+        Returns immediately so listeners never wait on Firestore, or on
+        parsing the event; the session's writer task decodes and stores
+        queued events in order. The queue is bounded: when it is full, the
+        oldest queued event is dropped.
+        '''
+        item = (raw_event, timestamp)
+        try:
+            self._firestore_queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self._firestore_queue.get_nowait()
+            self._firestore_queue.put_nowait(item)
+            log(LogLevel.WARNING, 'Firestore queue full, dropped the oldest event.')
+
+    async def _run_firestore_writer(self):
+        while True:
+            await self._store_firestore_event(*await self._firestore_queue.get())
+
+    async def _store_firestore_event(self, raw_event: bytes, timestamp: datetime.datetime):
+        # Parsed inline: orjson holds the GIL, so a worker thread would only add a hand-off,
+        # and an await here would let cancellation drop the item already taken off the queue
+        try: event = orjson.loads(raw_event)  # Stored in full, so decode every field
+        except orjson.JSONDecodeError as e:
+            log(LogLevel.WARNING, f'Dropped undecodable Firestore event: {e}')
+            return
+        event['timestamp'] = timestamp
+        await firestore.add_event_to_call_document(self.stream_sid, event)
+
+    async def _queue_twilio_frames(self, frames: tuple):
+        queue = self._twilio_queue
+        try:
+            queue.put_nowait(frames)
+            return
+        except asyncio.QueueFull:
+            pass
+
+        # Yield to the sender for as long as it is not stalled
+        started = self._twilio_send_started
+        wait_s = TWILIO_STALL_S - (time.monotonic() - started) if started is not None else TWILIO_STALL_S
+        if wait_s > 0:
+            try:
+                async with asyncio.timeout(wait_s):
+                    await queue.put(frames)
+                return
+            except TimeoutError:
+                pass
+
+        if queue.full():
+            queue.get_nowait()
+            self._record_twilio_drop()
+        queue.put_nowait(frames)
+
+    def _record_twilio_drop(self):
+        self._twilio_dropped += 1
+        now = time.monotonic()
+        if now - self._twilio_drop_logged_at >= TWILIO_DROP_LOG_INTERVAL_S:
+            log(LogLevel.WARNING, f'Twilio send stalled, dropped {self._twilio_dropped} queued audio chunk(s).')
+            self._twilio_dropped = 0
+            self._twilio_drop_logged_at = now
+
+    async def _run_twilio_sender(self):
+        while True:
+            frames = await self._twilio_queue.get()
+            ws = self.ws_twilio
+            if ws:
+                self._twilio_send_started = time.monotonic()
+                try:
+                    for frame in frames: await ws.send_text(frame)
+                except Exception: pass
+                finally: self._twilio_send_started = None
 
     async def close_connections(self, reason: str = 'Session ended'):
         log(LogLevel.INFO, f'Closing connections. Reason: {reason}')
-        pass
+
+        # Undelivered audio is useless once the call is over, so it is discarded
+        if self._twilio_sender and not self._twilio_sender.done():
+            self._twilio_sender.cancel()
+            try: await self._twilio_sender
+            except asyncio.CancelledError: pass
+        if self._twilio_dropped:
+            log(LogLevel.WARNING, f'Twilio send stalled, dropped {self._twilio_dropped} queued audio chunk(s).')
+
+        if self._firestore_writer and not self._firestore_writer.done():
+            self._firestore_writer.cancel()
+            try: await self._firestore_writer
+            except asyncio.CancelledError: pass
+        while not self._firestore_queue.empty():
+            await self._store_firestore_event(*self._firestore_queue.get_nowait())
+        await firestore.release(self.stream_sid)
 
 
 class OpenAISession(Session):
     def __init__(self, stream_sid: str, ai_api_key: str, config: Optional[openai.SessionConfig] = None):
         super().__init__(stream_sid, ai_api_key, config)
 
+        # Twilio frames for this stream, serialized once since `stream_sid` never changes.
+        # Audio is spliced between the media prefix and suffix; base64 needs no JSON escaping.
+        # https://www.twilio.com/docs/voice/media-streams/websocket-messages#send-a-media-message
+        # https://www.twilio.com/docs/voice/media-streams/websocket-messages#send-a-mark-message
+        quoted_sid = orjson.dumps(stream_sid).decode()
+        self._media_prefix: str = f'{{"event":"media","streamSid":{quoted_sid},"media":{{"payload":"'
+        self._media_suffix: str = '"}}'
+        self._mark_frame: str = orjson.dumps({
+            'event': 'mark',
+            'streamSid': stream_sid,
+            'mark': {'name': 'response_audio_chunk_sent'}
+        }).decode()
+
     async def connect_model(self):
-        await super().connect_model()
-
-        openai_ws_url = 'wss://api.openai.com/v1/realtime?model=gpt-4o-realtime-preview' 
-        headers = [
-            ('Authorization', f'Bearer {self.ai_api_key}'),
-            ('OpenAI-Beta', 'realtime=v1'),
-        ]
-        print(openai_ws_url + '\n' + str(headers))
-        try:
-            self.ws_model = await websockets.connect(openai_ws_url, additional_headers=headers)
-            print(f'ws_model: {self.ws_model}')
-            self.is_model_connected = True  
-
-            await self.configure_model()
-            if not self.is_model_connected:
-                if self.ws_model:
-                    try: await self.ws_model.close()
-                    except: pass
-                self.ws_model = None
-                return
-            
-            if self._model_listener: self._model_listener.cancel()
-            self._model_listener = asyncio.create_task(self._run_model_listener())
+        # Serialize (re)connects so concurrent attempts cannot race on `ws_model`
+        async with self._connect_lock:
+            await super().connect_model()
+
+            openai_ws_url = 'wss://api.openai.com/v1/realtime?model=gpt-4o-realtime-preview' 
+            headers = [
+                ('Authorization', f'Bearer {self.ai_api_key}'),
+                ('OpenAI-Beta', 'realtime=v1'),
+            ]
+            # Tear down any previous connection so its listener cannot outlive it
+            await self._disconnect_model()
+
+            log(LogLevel.DEBUG, f'Connecting to {openai_ws_url}')  # Never log `headers`, they carry the API key
+            try:
+                # Audio deltas are already base64-encoded G.711, so permessage-deflate only burns CPU;
+                # a larger write buffer and no message size cap avoid drains and drops on large events
+                ws_model = await websockets.connect(
+                    openai_ws_url,
+                    additional_headers=headers,
+                    ssl=_SSL_CONTEXT,
+                    compression=None,
+                    max_size=None,
+                    write_limit=2**20,
+                    ping_interval=20,
+                    ping_timeout=20,
+                )
+                self.ws_model = ws_model
+                self.is_model_connected = True
+
+                await self.configure_model()
+                if not self.is_model_connected:
+                    await self._disconnect_model()
+                    return
+
+                self._model_listener = asyncio.create_task(self._run_model_listener(ws_model))
+
+            except Exception as e:
+                log(LogLevel.WARNING, f'Failed to connect to OpenAI model: {e}')
+                await self._disconnect_model()
+
+    async def _disconnect_model(self):
+        '''Stops the model listener and closes the model connection, if either exists.'''
+        if self._model_listener and not self._model_listener.done():
+            self._model_listener.cancel()
+            try: await self._model_listener
+            except asyncio.CancelledError: log(LogLevel.INFO, 'Model listener cancelled.')
+        self._model_listener = None
 
-        except Exception as e:
-            log(LogLevel.WARNING, f'Failed to connect to OpenAI model: {e}')
-            self.ws_model = None; self.is_model_connected = False
+        ws_model, self.ws_model = self.ws_model, None
+        self.is_model_connected = False
+        if ws_model:
+            try: await ws_model.close()
+            except Exception: pass
 
     async def configure_model(self):
         # https://platform.openai.com/docs/api-reference/realtime-client-events/session/update
-        update_event = openai.SessionUpdateEvent(session=self.config)
-        await self.send_to_websocket(WebSocketRole.MODEL, update_event.model_dump(exclude_none=True))
+        await self.send_model_raw(self.config.to_update_payload())
 
-    async def _run_model_listener(self):
+    async def _run_model_listener(self, ws_model):
         try:
-            async for msg in self.ws_model:
-                log(LogLevel.INFO, 'Received Event:')
-                log(LogLevel.INFO, msg)
+            while True:
+                # Raw bytes skip the UTF-8 decode; both decoders parse bytes directly
+                msg = await ws_model.recv(decode=False)
                 try:
-                    event = json.loads(msg)
-                    match event.get('type'):
-
-                        # https://platform.openai.com/docs/api-reference/realtime-server-events/response/audio/delta
-                        case 'response.audio.delta':
-
-                            # https://www.twilio.com/docs/voice/media-streams/websocket-messages#send-a-media-message
-                            await self.send_to_websocket(WebSocketRole.TWILIO, {
-                                'event': 'media',
-                                'streamSid': self.stream_sid,
-                                'media': {'payload': event.get('delta')}
-                            })
-                            # https://www.twilio.com/docs/voice/media-streams/websocket-messages#send-a-mark-message
-                            await self.send_to_websocket(WebSocketRole.TWILIO, {
-                                'event': 'mark',
-                                'streamSid': self.stream_sid,
-                                'name': 'response_audio_chunk_sent' 
-                            })
-
-                        # https://platform.openai.com/docs/api-reference/realtime-server-events/response/done
-                        # https://platform.openai.com/docs/api-reference/realtime-server-events/conversation/item/input_audio_transcription/completed
-                        case 'response.done' | 'conversation.item.input_audio_transcription.completed':
-                            event['timestamp'] = datetime.datetime.now(datetime.timezone.utc)
-                            firestore.add_event_to_call_document(self.stream_sid, event)
-
-                        # TODO: Implement text streaming to firestore (not working)
-                        # https://platform.openai.com/docs/api-reference/realtime-server-events/response/text/delta
-                        # https://platform.openai.com/docs/api-reference/realtime-server-events/response/text/done
-                        # case 'response.text.delta' | 'response.text.done':
-                        #     event['timestamp'] = datetime.datetime.now(datetime.timezone.utc)
-                        #     firestore.add_event_to_call_document(self.stream_sid, event)
-
+                    # Fast path: splice the base64 straight out of the raw frame without decoding the event
+                    match = _AUDIO_DELTA_RE.match(msg)
+                    if match:
+                        await self._forward_audio(match.group(1).decode('ascii'))
+                        continue
+
+                    header = openai.SERVER_EVENT_DECODER.decode(msg)
+                    # Audio deltas (~50/s, kilobytes of base64 each) are never logged
+                    if header.type != 'response.audio.delta' and is_enabled(LogLevel.DEBUG):
+                        log(LogLevel.DEBUG, f'Received Event: {msg.decode()}')
+
+                    handler = _MODEL_EVENT_HANDLERS.get(header.type)
+                    if handler: await handler(self, header, msg)
                 except Exception as e:
                     log(LogLevel.WARNING, f'Model listener: Error processing event: {e}')
+        except ws_exceptions.ConnectionClosedOK:
+            pass
         except ws_exceptions.ConnectionClosed as e:
             log(LogLevel.WARNING, f'Model listener: Connection closed - {e}')
         except Exception as e:
             log(LogLevel.WARNING, f'Unhandled error: {e}')
         finally:
             log(LogLevel.INFO, 'Model listener stopped.')
-            self.is_model_connected = False
-            if self.ws_model and not self.ws_model.closed:
-                try: await self.ws_model.close()
-                except: pass
-            self.ws_model = None
+            # Only this listener's connection is closed; `ws_model` may already hold a newer one.
+            # `close` is a no-op on an already closed connection, so no state check is needed
+            try: await ws_model.close()
+            except Exception: pass
+            if self.ws_model is ws_model:
+                self.ws_model = None
+                self.is_model_connected = False
+
+    # https://platform.openai.com/docs/api-reference/realtime-server-events/response/audio/delta
+    async def _handle_audio_delta(self, header: openai.ServerEventHeader, msg: bytes):
+        await self._forward_audio(header.delta)
+
+    async def _forward_audio(self, delta: str):
+        await self.send_raw_text(WebSocketRole.TWILIO, self._media_prefix + delta + self._media_suffix, self._mark_frame)
+
+    # https://platform.openai.com/docs/api-reference/realtime-server-events/response/done
+    # https://platform.openai.com/docs/api-reference/realtime-server-events/conversation/item/input_audio_transcription/completed
+    async def _handle_stored_event(self, header: openai.ServerEventHeader, msg: bytes):
+        # Decoded by the Firestore writer task, keeping the full parse off the listener
+        self.queue_firestore_event(msg, _now(_UTC))
+
+    # TODO: Implement text streaming to firestore (not working)
+    # https://platform.openai.com/docs/api-reference/realtime-server-events/response/text/delta
+    # https://platform.openai.com/docs/api-reference/realtime-server-events/response/text/done
+    # 'response.text.delta' | 'response.text.done' -> `_handle_stored_event`
 
     async def _run_twilio_listener():
         pass
 
     async def close_connections(self, reason: str = 'Session ended'):
+        # Stop the listener first so no events are queued after the Firestore queue is drained.
+        # Holding the connect lock keeps an in-flight connect from assigning a socket afterwards.
+        async with self._connect_lock:
+            await self._disconnect_model()
+
         await super().close_connections(reason=reason)
-        
-        if self._model_listener and not self._model_listener.done():
-            self._model_listener.cancel()
-            try: await self._model_listener
-            except asyncio.CancelledError: log(LogLevel.INFO, 'Model listener cancelled.')
 
-        for ws in [self.ws_frontend, self.ws_twilio, self.ws_model]:
-            if ws:
-                try:
-                    if hasattr(ws, 'close'): await ws.close(code=1000, reason=reason)
-                except Exception: pass
-                finally: ws = None
+        # Close concurrently so teardown costs one round trip rather than one per socket
+        async with asyncio.TaskGroup() as tg:
+            for ws in (self.ws_frontend, self.ws_twilio, self.ws_model):
+                if ws: tg.create_task(_safe_close(ws, reason))
+        self.ws_frontend = self.ws_twilio = self.ws_model = None
         self.is_model_connected = False
         log(LogLevel.INFO, 'All connections successfully closed.')
 
 
+# Handlers for model server events, keyed by event type
+_MODEL_EVENT_HANDLERS = {
+    'response.audio.delta': OpenAISession._handle_audio_delta,
+    'response.done': OpenAISession._handle_stored_event,
+    'conversation.item.input_audio_transcription.completed': OpenAISession._handle_stored_event,
+}
+
+
 _active_sessions: Dict[str, Session] = {}  # (k, v) = (Stream SID, Session)
 
+# Initial configuration for the AI to speak first and handle audio correctly.
+# Frozen, so every session shares it (and its cached update payload and document).
+_DEFAULT_CONFIG = openai.SessionConfig(
+    instructions='You are a helpful AI assistant!',
+    output_audio_format='g711_ulaw',  # Twilio expects mu-law (audio/x-mulaw)
+    voice='alloy',
+    input_audio_format='g711_ulaw',  # Twilio sends mu-law (audio/x-mulaw)
+    input_audio_transcription=openai.InputAudioTranscriptionConfig(
+        model='whisper-1'
+    ),
+    turn_detection=openai.TurnDetectionConfig(
+        type='server_vad',
+        create_response=True
+    )
+)
+
 
-async def get(stream_sid: str):
+def get(stream_sid: str) -> Optional[Session]:
     return _active_sessions.get(stream_sid)
 
-async def create(stream_sid: str, ai_api_key: str) -> OpenAISession:
-    if stream_sid in _active_sessions:
-        existing_session = await get(stream_sid)
-        if existing_session: # Should always be true
-             return existing_session
-    
-    # Initial configuration for the AI to speak first and handle audio correctly
-    init_config = openai.SessionConfig(
-        instructions='You are a helpful AI assistant!',
-        output_audio_format=openai.OutputAudioFormatEnum.G711_ULAW,   # Twilio expects mu-law (audio/x-mulaw)
-        voice=openai.VoiceEnum.ALLOY,
-        input_audio_format=openai.InputAudioFormatEnum.G711_ULAW,  # Twilio sends mu-law (audio/x-mulaw)
-        input_audio_transcription=openai.InputAudioTranscriptionConfig(
-            model=openai.TranscriptionModelEnum.WHISPER_1
-        ),
-        turn_detection=openai.TurnDetectionConfig(
-            type=openai.TurnDetectionTypeEnum.SERVER_VAD,
-            create_response=True
-        )
-    )
-    session = OpenAISession(stream_sid, ai_api_key, config=init_config)
-    _active_sessions[stream_sid] = session
+def create(stream_sid: str, ai_api_key: str) -> OpenAISession:
+    '''
+    Returns the session for `stream_sid`, creating and storing it first if needed.
+
+    Synchronous on purpose: with no `await` between the lookup and the insert,
+    concurrent callers on the event loop cannot both create a session.
+    '''
+    session = _active_sessions.get(stream_sid)
+    if session is None:
+        session = _active_sessions[stream_sid] = OpenAISession(stream_sid, ai_api_key, config=_DEFAULT_CONFIG)
     # log(LogLevel.INFO, f'OpenAISession created and stored for {stream_sid}.')
     return session
 